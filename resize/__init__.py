@@ -1,7 +1,9 @@
-from .kitti import load_kitti_labels, write_kitti_labels
+from .kitti import KittiLabels, load_kitti_array, load_kitti_labels, write_kitti_labels
 from .transform import apply_letterbox, apply_stretch, scale_objects
 
 __all__ = [
+    "KittiLabels",
+    "load_kitti_array",
     "load_kitti_labels",
     "write_kitti_labels",
     "apply_stretch",
@@ -0,0 +1,35 @@
+import numpy as np
+
+try:  # Optional: Numba-compiled kernels, NumPy fallback otherwise
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _scale_boxes_numpy(
+    bboxes: np.ndarray, scale_vec: np.ndarray, offset_vec: np.ndarray
+) -> None:
+    """
+    Scale and offset an (N, 4) array of bounding boxes in place.
+
+    Args:
+        bboxes: Bounding boxes as x1, y1, x2, y2 rows.
+        scale_vec: Scale factors for (x1, y1, x2, y2).
+        offset_vec: Offsets for (x1, y1, x2, y2), added after scaling.
+    """
+    bboxes *= scale_vec
+    bboxes += offset_vec
+
+
+if njit is not None:
+
+    @njit(cache=True)
+    def _scale_boxes_numba(bboxes, scale_vec, offset_vec):
+        """Compiled equivalent of _scale_boxes_numpy."""
+        for i in range(bboxes.shape[0]):
+            for j in range(4):
+                bboxes[i, j] = bboxes[i, j] * scale_vec[j] + offset_vec[j]
+
+    scale_boxes = _scale_boxes_numba
+else:
+    scale_boxes = _scale_boxes_numpy
@@ -1,19 +1,44 @@
 import argparse
 import logging
+import mmap
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
+from itertools import islice
 from pathlib import Path
 from time import perf_counter
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, Union
 
 import cv2
+import numpy as np
 from tqdm import tqdm
 
-from .kitti import load_kitti_labels, write_kitti_labels
-from .transform import apply_letterbox, apply_stretch
+from .kitti import KittiLabels, load_kitti_array, write_kitti_labels
+from .transform import (
+    DEVICES,
+    ENGINES,
+    apply_letterbox,
+    apply_stretch,
+    cuda_available,
+    scale_objects,
+)
 
 # Available transformation modes
 MODES = {"stretch": apply_stretch, "letterbox": apply_letterbox}
 
+# JPEG decode flags that downscale by a power of two during decoding
+REDUCED_DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
 # Setup basic logging
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+log = logging.getLogger(__name__)
 
 
 def get_args() -> argparse.Namespace:
@@ -52,10 +77,404 @@ def get_args() -> argparse.Namespace:
         "--mode", choices=MODES.keys(), default="letterbox", help="Resize mode"
     )
     parser.add_argument("--img_ext", default="jpg", help="Image file extension")
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="opencv",
+        help="Resize backend (pil uses Pillow, or pillow-simd if installed)",
+    )
+    parser.add_argument(
+        "--device",
+        choices=DEVICES,
+        default="cpu",
+        help="Resize on the GPU with CUDA-enabled OpenCV (opencv engine only)",
+    )
+    parser.add_argument(
+        "--reduced_decode",
+        action="store_true",
+        help="Decode JPEGs at 1/2, 1/4 or 1/8 size when the target is that "
+        "much smaller (factor picked from the first readable image; images too "
+        "small for it are decoded at full size)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: CPU count, or 1 with "
+        "--device cuda); 1 runs a threaded I/O pipeline in a single process",
+    )
 
     return parser.parse_args()
 
 
+def _init_worker() -> None:
+    """
+    Initialize a worker process.
+
+    OpenCV's internal threading is disabled so that worker processes
+    don't oversubscribe the available cores.
+    """
+    cv2.setNumThreads(1)
+
+
+@lru_cache(maxsize=1)
+def _dst_buffer(new_w: int, new_h: int) -> np.ndarray:
+    """
+    Return the output image buffer reused by this worker process.
+
+    Args:
+        new_w: Target width
+        new_h: Target height
+
+    Returns:
+        Preallocated BGR image of the target size
+    """
+    return np.empty((new_h, new_w, 3), dtype=np.uint8)
+
+
+def _imread_mmap(
+    path: Union[str, Path], flags: int = cv2.IMREAD_COLOR
+) -> Optional[np.ndarray]:
+    """
+    Load an image by decoding a memory-mapped view of its file.
+
+    Args:
+        path: Path to the image file
+        flags: OpenCV imread flags
+
+    Returns:
+        Decoded BGR image, or None if it could not be decoded
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            data = np.frombuffer(buf, dtype=np.uint8)
+            img = cv2.imdecode(data, flags)
+            del data  # release the buffer before the map is closed
+
+    return img
+
+
+def _imwrite_bytes(path: str, img: np.ndarray) -> bool:
+    """
+    Encode an image in memory and write it with a single call.
+
+    Args:
+        path: Output path; its extension selects the encoder
+        img: Image to save
+
+    Returns:
+        True if successful, False otherwise
+    """
+    ok, buf = cv2.imencode(os.path.splitext(path)[1], img)
+    if not ok:
+        return False
+
+    with open(path, "wb") as f:
+        f.write(buf)
+    return True
+
+
+def _decode_factor(images: List[Path], new_w: int, new_h: int, mode: str) -> int:
+    """
+    Pick how much JPEG decoding can downscale without hurting the output.
+
+    The factor is the largest power of two (up to 8) for which the reduced
+    image is still at least as large as what the transform resizes it to.
+    It is picked from the first image that decodes; images that turn out
+    smaller are decoded again at full size (see _load).
+
+    Args:
+        images: Paths to the input images
+        new_w: Target width
+        new_h: Target height
+        mode: Transformation mode (key of MODES)
+
+    Returns:
+        Decode factor, one of REDUCED_DECODE_FLAGS (1 disables reduction)
+    """
+    for img_path in images:
+        if img_path.suffix.lower() not in (".jpg", ".jpeg"):
+            return 1
+
+        img = _imread_mmap(img_path)
+        if img is None:
+            log.warning("Could not decode %s, trying the next image", img_path.name)
+            continue
+
+        src_h, src_w = img.shape[:2]
+        ratio = _downscale_ratio(src_w, src_h, new_w, new_h, mode)
+        return next((f for f in (8, 4, 2) if ratio >= f), 1)
+
+    return 1
+
+
+def _downscale_ratio(
+    src_w: int, src_h: int, new_w: int, new_h: int, mode: str
+) -> float:
+    """
+    Compute how much the transform shrinks an image of the given size.
+
+    Args:
+        src_w: Source width
+        src_h: Source height
+        new_w: Target width
+        new_h: Target height
+        mode: Transformation mode (key of MODES)
+
+    Returns:
+        Downscale ratio (below 1 when the transform upscales)
+    """
+    if mode == "letterbox":
+        return max(src_w / new_w, src_h / new_h)
+    return min(src_w / new_w, src_h / new_h)
+
+
+def _load(
+    img_path: Path,
+    in_lbl: str,
+    new_w: int,
+    new_h: int,
+    mode: str,
+    decode_factor: int = 1,
+) -> Tuple[Optional[np.ndarray], Optional[KittiLabels]]:
+    """
+    Load an image and its labels.
+
+    Args:
+        img_path: Path to the input image
+        in_lbl: Input labels directory
+        new_w: Target width, used to check the decode reduction
+        new_h: Target height, used to check the decode reduction
+        mode: Transformation mode (key of MODES)
+        decode_factor: JPEG decode reduction; labels are scaled to match
+
+    Returns:
+        Tuple of (image, labels); both are None if the image could not be loaded
+    """
+    img = _imread_mmap(img_path, REDUCED_DECODE_FLAGS[decode_factor])
+    if img is None:
+        return None, None
+
+    if decode_factor > 1:
+        src_h, src_w = (n * decode_factor for n in img.shape[:2])
+        if _downscale_ratio(src_w, src_h, new_w, new_h, mode) < decode_factor:
+            # Too small once reduced: the transform would upscale it
+            log.debug("Decoding %s at full resolution", img_path.name)
+            decode_factor = 1
+            img = _imread_mmap(img_path)
+            if img is None:
+                return None, None
+
+    label_name = img_path.stem + ".txt"
+    objects = load_kitti_array(os.path.join(in_lbl, label_name))
+    log.debug("Loaded %d objects from %s", len(objects), label_name)
+
+    if decode_factor > 1:
+        factor = 1 / decode_factor
+        objects = scale_objects(objects, factor, factor, copy=False)
+    return img, objects
+
+
+def _save(
+    img_path: Path,
+    out_imgs: str,
+    out_lbls: str,
+    img: np.ndarray,
+    objects: KittiLabels,
+) -> Tuple[int, int]:
+    """
+    Save a transformed image and its labels.
+
+    Args:
+        img_path: Path to the input image (used to name the outputs)
+        out_imgs: Output images directory
+        out_lbls: Output labels directory
+        img: Transformed image
+        objects: Transformed labels
+
+    Returns:
+        Tuple of (processed, errors) counts for this image
+    """
+    img_name = img_path.name
+    success = _imwrite_bytes(os.path.join(out_imgs, img_name), img)
+    if not success:
+        log.warning("Failed to save image: %s", img_name)
+        return 0, 1
+
+    label_name = img_path.stem + ".txt"
+    if not write_kitti_labels(os.path.join(out_lbls, label_name), objects):
+        log.warning("Failed to save labels: %s", label_name)
+        return 0, 1
+
+    log.debug("Successfully processed: %s", img_name)
+    return 1, 0
+
+
+def _process_one(
+    img_path: Path,
+    in_lbl: str,
+    out_imgs: str,
+    out_lbls: str,
+    new_w: int,
+    new_h: int,
+    transform_fn: Callable,
+    decode_factor: int = 1,
+    mode: str = "letterbox",
+) -> Tuple[int, int]:
+    """
+    Resize a single image and its labels.
+
+    Args:
+        img_path: Path to the input image
+        in_lbl: Input labels directory
+        out_imgs: Output images directory
+        out_lbls: Output labels directory
+        new_w: Target width
+        new_h: Target height
+        transform_fn: Transformation function (a value of MODES)
+        decode_factor: JPEG decode reduction (see _decode_factor)
+        mode: Transformation mode (key of MODES)
+
+    Returns:
+        Tuple of (processed, errors) counts for this image
+    """
+    try:
+        img, objects = _load(img_path, in_lbl, new_w, new_h, mode, decode_factor)
+        if img is None:
+            log.warning("Could not load image: %s", img_path.name)
+            return 0, 1
+
+        # Safe to reuse: the result is saved before the next image is loaded
+        img_resized, objects_resized = transform_fn(
+            img, objects, new_w, new_h, dst=_dst_buffer(new_w, new_h)
+        )
+        return _save(img_path, out_imgs, out_lbls, img_resized, objects_resized)
+
+    except Exception as e:
+        log.error("Error processing %s: %s", img_path.name, e)
+        return 0, 1
+
+
+def _run_pipelined(
+    images: List[Path],
+    in_lbl: str,
+    out_imgs: str,
+    out_lbls: str,
+    new_w: int,
+    new_h: int,
+    transform_fn: Callable,
+    decode_factor: int = 1,
+    mode: str = "letterbox",
+    io_workers: int = 4,
+) -> Iterator[Tuple[int, int]]:
+    """
+    Resize images in this process, overlapping I/O with the transform.
+
+    Images are decoded ahead of time and encoded in the background by
+    thread pools (OpenCV releases the GIL), while the calling thread runs
+    the transforms. At most 2 * io_workers images are queued per stage.
+
+    Args:
+        images: Paths to the input images
+        in_lbl: Input labels directory
+        out_imgs: Output images directory
+        out_lbls: Output labels directory
+        new_w: Target width
+        new_h: Target height
+        transform_fn: Transformation function (a value of MODES)
+        decode_factor: JPEG decode reduction (see _decode_factor)
+        mode: Transformation mode (key of MODES)
+        io_workers: Number of threads for each of loading and saving
+
+    Yields:
+        Tuple of (processed, errors) counts, one per image
+    """
+    backlog = 2 * io_workers
+
+    loader = ThreadPoolExecutor(io_workers)
+    saver = ThreadPoolExecutor(io_workers)
+    load = partial(
+        _load,
+        in_lbl=in_lbl,
+        decode_factor=decode_factor,
+        new_w=new_w,
+        new_h=new_h,
+        mode=mode,
+    )
+    pending = iter(images)
+    loads = deque(
+        (path, loader.submit(load, path)) for path in islice(pending, backlog)
+    )
+    saves = deque()
+
+    with loader, saver:
+        while loads:
+            img_path, loaded = loads.popleft()
+            for path in islice(pending, 1):
+                loads.append((path, loader.submit(load, path)))
+
+            try:
+                img, objects = loaded.result()
+                if img is None:
+                    log.warning("Could not load image: %s", img_path.name)
+                    saves.append((img_path, None))
+                else:
+                    resized = transform_fn(img, objects, new_w, new_h)
+                    saved = saver.submit(_save, img_path, out_imgs, out_lbls, *resized)
+                    saves.append((img_path, saved))
+            except Exception as e:
+                log.error("Error processing %s: %s", img_path.name, e)
+                saves.append((img_path, None))
+
+            # Bound the save backlog; drain it once everything is loaded
+            while len(saves) > backlog or (saves and not loads):
+                yield _save_result(*saves.popleft())
+
+
+def _save_result(img_path: Path, saved: Optional[Future]) -> Tuple[int, int]:
+    """
+    Wait for a background save and return its (processed, errors) counts.
+
+    Args:
+        img_path: Path to the input image
+        saved: Future of the _save call, or None if the image already failed
+
+    Returns:
+        Tuple of (processed, errors) counts for this image
+    """
+    if saved is None:
+        return 0, 1
+
+    try:
+        return saved.result()
+    except Exception as e:
+        log.error("Error processing %s: %s", img_path.name, e)
+        return 0, 1
+
+
+def _tally(results: Iterable[Tuple[int, int]], total: int) -> Tuple[int, int]:
+    """
+    Sum per-image (processed, errors) counts while showing progress.
+
+    Args:
+        results: Per-image (processed, errors) counts
+        total: Number of images, for the progress bar
+
+    Returns:
+        Tuple of total (processed, errors) counts
+    """
+    processed = 0
+    errors = 0
+    for ok, err in tqdm(results, total=total, desc="Processing"):
+        processed += ok
+        errors += err
+
+    return processed, errors
+
+
 def main() -> int:
     """
     Main processing function.
@@ -64,95 +483,101 @@ def main() -> int:
         Exit code (0 for success, 1 for error)
     """
     args = get_args()
-    logging.info("Starting image resize process")
+    log.info("Starting image resize process")
 
     # Check inputs exist
     if not args.in_img.exists():
-        logging.error(f"Images directory not found: {args.in_img}")
+        log.error("Images directory not found: %s", args.in_img)
         return 1
 
     if not args.in_lbl.exists():
-        logging.error(f"Labels directory not found: {args.in_lbl}")
+        log.error("Labels directory not found: %s", args.in_lbl)
         return 1
 
     # Setup paths
     new_w, new_h = args.size
-    transform_fn = MODES[args.mode]
     out_imgs = args.out / "images"
     out_lbls = args.out / "labels"
 
-    logging.info(f"Using {args.mode} mode, target size: {new_w}x{new_h}")
-
-    # Find images - support multiple extensions
-    images = list(args.in_img.glob(f"*.{args.img_ext}"))
-    images.extend(args.in_img.glob(f"*.{args.img_ext.upper()}"))
-    images = sorted(set(images))  # Remove duplicates and sort
+    log.info("Using %s mode, target size: %dx%d", args.mode, new_w, new_h)
+    if args.device == "cuda" and args.engine != "opencv":
+        log.warning("--device cuda only applies to the opencv engine, ignoring it")
+    elif args.device == "cuda" and not cuda_available():
+        log.warning("No CUDA device available to OpenCV, resizing on the CPU")
+
+    # Find images - match the extension in any case, in one directory pass
+    suffix = f".{args.img_ext.lower()}"
+    with os.scandir(args.in_img) as entries:
+        images = [
+            Path(entry.path)
+            for entry in entries
+            if entry.name.lower().endswith(suffix) and entry.is_file()
+        ]
+    images.sort()
 
     if not images:
-        logging.error(f"No images found with extension .{args.img_ext}")
+        log.error("No images found with extension .%s", args.img_ext)
         return 1
 
-    logging.info(f"Found {len(images)} images to process")
+    log.info("Found %d images to process", len(images))
 
     # Create output directories
     out_imgs.mkdir(parents=True, exist_ok=True)
     out_lbls.mkdir(parents=True, exist_ok=True)
-    logging.info(f"Created output directories: {args.out}")
+    log.info("Created output directories: %s", args.out)
+
+    decode_factor = 1
+    if args.reduced_decode:
+        decode_factor = _decode_factor(images, new_w, new_h, args.mode)
+        log.info("Decoding images at 1/%d resolution", decode_factor)
 
     # Process images
     start_time = perf_counter()
-    processed = 0
-    errors = 0
 
-    for img_path in tqdm(images, desc="Processing"):
-        try:
-            # Load image
-            img = cv2.imread(str(img_path))
-            if img is None:
-                logging.warning(f"Could not load image: {img_path.name}")
-                errors += 1
-                continue
-
-            # Load labels
-            label_path = args.in_lbl / f"{img_path.stem}.txt"
-            objects = load_kitti_labels(label_path)
-            logging.debug(f"Loaded {len(objects)} objects from {label_path.name}")
-
-            # Transform
-            img_resized, objects_resized = transform_fn(img, objects, new_w, new_h)
-
-            # Save results
-            out_img_path = out_imgs / img_path.name
-            success = cv2.imwrite(str(out_img_path), img_resized)
-            if not success:
-                logging.warning(f"Failed to save image: {img_path.name}")
-                errors += 1
-                continue
-
-            out_lbl_path = out_lbls / f"{img_path.stem}.txt"
-            if not write_kitti_labels(out_lbl_path, objects_resized):
-                logging.warning(f"Failed to save labels: {img_path.stem}.txt")
-                errors += 1
-                continue
-
-            processed += 1
-            logging.debug(f"Successfully processed: {img_path.name}")
-
-        except Exception as e:
-            logging.error(f"Error processing {img_path.name}: {e}")
-            errors += 1
-            continue
+    # Resolve paths and the transform once; workers only join file names.
+    # Labels are loaded fresh per image, so the transform may scale them in place.
+    worker = partial(
+        _process_one,
+        in_lbl=os.fspath(args.in_lbl),
+        out_imgs=os.fspath(out_imgs),
+        out_lbls=os.fspath(out_lbls),
+        new_w=new_w,
+        new_h=new_h,
+        transform_fn=partial(
+            MODES[args.mode], engine=args.engine, device=args.device, copy=False
+        ),
+        decode_factor=decode_factor,
+        mode=args.mode,
+    )
+    workers = args.workers
+    if workers is None:
+        # Every worker process would open its own CUDA context on the GPU
+        workers = 1 if args.device == "cuda" else os.cpu_count()
+    workers = max(1, workers or 1)
+
+    # A CUDA context doesn't survive fork(), so GPU workers are spawned
+    context = multiprocessing.get_context("spawn" if args.device == "cuda" else None)
+
+    if workers > 1:
+        with ProcessPoolExecutor(
+            workers, mp_context=context, initializer=_init_worker
+        ) as pool:
+            results = pool.map(worker, images, chunksize=8)
+            processed, errors = _tally(results, len(images))
+    else:
+        results = _run_pipelined(images, **worker.keywords)
+        processed, errors = _tally(results, len(images))
 
     # Summary
     duration = perf_counter() - start_time
-    logging.info(f"Processing completed in {duration:.1f}s")
-    logging.info(f"Successfully processed: {processed}/{len(images)} images")
+    log.info("Processing completed in %.1fs", duration)
+    log.info("Successfully processed: %d/%d images", processed, len(images))
 
     if errors > 0:
-        logging.warning(f"Encountered {errors} errors")
+        log.warning("Encountered %d errors", errors)
         return 1
 
-    logging.info("All images processed successfully!")
+    log.info("All images processed successfully!")
     return 0
 
 
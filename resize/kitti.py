@@ -1,174 +1,441 @@
 import logging
+import mmap
+import os
+import re
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
 
 # Basic logging setup
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+log = logging.getLogger(__name__)
 
+# KITTI line formats (without and with the optional score column)
+_FMT = "%s %.2f %d %.6f %.2f %.2f %.2f %.2f %.2f %.2f %.2f %.2f %.2f %.2f %.6f"
+_FMT_SCORE = _FMT + " %.4f"
 
-def load_kitti_labels(label_path: Union[str, Path]) -> List[Dict[str, Any]]:
+# Structured row layouts of a KITTI label file (without and with score)
+_DTYPE = np.dtype(
+    [
+        ("class_name", object),
+        ("truncation", float),
+        ("occlusion", int),
+        ("alpha", float),
+        ("bounding_box", float, 4),
+        ("3d_dimensions", float, 3),
+        ("location", float, 3),
+        ("rotation_y", float),
+    ]
+)
+_DTYPE_SCORE = np.dtype(_DTYPE.descr + [("score", float)])
+
+# Fields an object needs to be written as a KITTI line
+_REQUIRED = frozenset(
+    {
+        "class_name",
+        "truncation",
+        "occlusion",
+        "alpha",
+        "bounding_box",
+        "3d_dimensions",
+        "location",
+        "rotation_y",
+    }
+)
+
+
+@dataclass
+class KittiLabels:
     """
-    Parse a KITTI label file and return a list of object annotations.
+    KITTI annotations for one image, stored column-wise.
+
+    Each numeric field is a NumPy array with one row per object, so
+    transformations can operate on whole columns at once. Missing scores
+    are stored as NaN.
+    """
+
+    class_names: List[str]
+    truncation: np.ndarray  # (N,)
+    occlusion: np.ndarray  # (N,) int
+    alpha: np.ndarray  # (N,)
+    bboxes: np.ndarray  # (N, 4) x1, y1, x2, y2
+    dims3d: np.ndarray  # (N, 3) height, width, length
+    locations: np.ndarray  # (N, 3) x, y, z
+    rotation_y: np.ndarray  # (N,)
+    score: np.ndarray  # (N,) NaN when absent
+
+    def __len__(self) -> int:
+        return len(self.class_names)
+
+    @classmethod
+    def from_objects(cls, objects: List[Dict[str, Any]]) -> "KittiLabels":
+        """
+        Build column-wise labels from a list of object dictionaries.
+
+        Args:
+            objects: List of object dictionaries as returned by load_kitti_labels
+
+        Returns:
+            KittiLabels holding the same annotations
+        """
+        n = len(objects)
+        return cls(
+            class_names=[str(obj["class_name"]) for obj in objects],
+            truncation=np.array([obj["truncation"] for obj in objects], dtype=float),
+            occlusion=np.array([obj["occlusion"] for obj in objects], dtype=int),
+            alpha=np.array([obj["alpha"] for obj in objects], dtype=float),
+            bboxes=np.array(
+                [obj["bounding_box"] for obj in objects], dtype=float
+            ).reshape(n, 4),
+            dims3d=np.array(
+                [obj["3d_dimensions"] for obj in objects], dtype=float
+            ).reshape(n, 3),
+            locations=np.array(
+                [obj["location"] for obj in objects], dtype=float
+            ).reshape(n, 3),
+            rotation_y=np.array([obj["rotation_y"] for obj in objects], dtype=float),
+            score=np.array(
+                [
+                    np.nan if obj.get("score") is None else obj["score"]
+                    for obj in objects
+                ],
+                dtype=float,
+            ),
+        )
+
+    def to_objects(self) -> List[Dict[str, Any]]:
+        """
+        Convert to a list of object dictionaries.
+
+        Returns:
+            List of dictionaries, each containing complete KITTI annotation data
+        """
+        scores = [None if np.isnan(s) else s for s in self.score.tolist()]
+        return [
+            {
+                "class_name": name,
+                "truncation": trunc,
+                "occlusion": occ,
+                "alpha": alpha,
+                "bounding_box": bbox,
+                "3d_dimensions": dims,
+                "location": loc,
+                "rotation_y": rot,
+                "score": score,
+            }
+            for name, trunc, occ, alpha, bbox, dims, loc, rot, score in zip(
+                self.class_names,
+                self.truncation.tolist(),
+                self.occlusion.tolist(),
+                self.alpha.tolist(),
+                self.bboxes.tolist(),
+                self.dims3d.tolist(),
+                self.locations.tolist(),
+                self.rotation_y.tolist(),
+                scores,
+            )
+        ]
+
+    def format_lines(self) -> List[str]:
+        """
+        Format every object as a KITTI label line.
+
+        Returns:
+            List of label lines (without trailing newlines)
+        """
+        has_score = ~np.isnan(self.score)
+        return [
+            _FMT_SCORE % (name, *row) if scored else _FMT % (name, *row[:-1])
+            for name, row, scored in zip(
+                self.class_names,
+                self._rows().tolist(),
+                has_score.tolist(),
+            )
+        ]
+
+    def _rows(self) -> np.ndarray:
+        """Stack the numeric columns into an (N, 15) float array."""
+        return np.column_stack(
+            (
+                self.truncation,
+                self.occlusion,
+                self.alpha,
+                self.bboxes,
+                self.dims3d,
+                self.locations,
+                self.rotation_y,
+                self.score,
+            )
+        )
+
+
+def load_kitti_array(label_path: Union[str, Path]) -> KittiLabels:
+    """
+    Parse a KITTI label file into column-wise arrays.
 
     Args:
         label_path: Path to the KITTI label file
 
     Returns:
-        List of dictionaries, each containing complete KITTI annotation data
+        KittiLabels with one row per valid line (empty if the file is missing)
     """
     label_path = Path(label_path)
-    logging.debug(f"Loading labels from: {label_path}")
+    log.debug("Loading labels from: %s", label_path)
 
     if not label_path.exists():
-        logging.debug(f"File not found: {label_path}")
-        return []
+        log.debug("File not found: %s", label_path)
+        return _empty_labels()
 
-    objects = []
     try:
-        lines = label_path.read_text().splitlines()
-        logging.debug(f"Found {len(lines)} lines in file")
+        with label_path.open("rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return _empty_labels()
 
-        for line_num, line in enumerate(lines, 1):
-            line = line.strip()
-            if not line:
-                continue
+            # Map the file instead of reading it into a string
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                if re.search(rb"\S", buf) is None:
+                    return _empty_labels()
 
-            parts = line.split()
-            if len(parts) < 15:
-                logging.warning(
-                    f"Line {line_num} has only {len(parts)} fields (needs 15+)"
-                )
-                continue
-
-            try:
-                obj = {
-                    "class_name": parts[0],
-                    "truncation": float(parts[1]),
-                    "occlusion": int(parts[2]),
-                    "alpha": float(parts[3]),
-                    "bounding_box": [
-                        float(parts[4]),
-                        float(parts[5]),
-                        float(parts[6]),
-                        float(parts[7]),
-                    ],
-                    "3d_dimensions": [
-                        float(parts[8]),
-                        float(parts[9]),
-                        float(parts[10]),
-                    ],
-                    "location": [float(parts[11]), float(parts[12]), float(parts[13])],
-                    "rotation_y": float(parts[14]),
-                    "score": float(parts[15]) if len(parts) > 15 else None,
-                }
-                objects.append(obj)
-
-            except (ValueError, IndexError) as e:
-                logging.warning(f"Error parsing line {line_num}: {e}")
-                continue
+                labels = _parse_table(buf)
+                if labels is None:
+                    # Mixed or malformed lines: parse one line at a time
+                    buf.seek(0)
+                    lines = [line.decode() for line in iter(buf.readline, b"")]
+                    labels = _parse_lines(lines)
 
     except Exception as e:
-        logging.error(f"Error reading file: {e}")
-        return []
+        log.error("Error reading file: %s", e)
+        return _empty_labels()
+
+    log.debug("Successfully loaded %d objects", len(labels))
+    return labels
+
+
+def _parse_table(buf: mmap.mmap) -> Optional[KittiLabels]:
+    """
+    Parse a well-formed label file in one vectorized pass.
+
+    Args:
+        buf: Memory-mapped contents of a KITTI label file
+
+    Returns:
+        KittiLabels, or None if the lines don't all share one valid layout
+    """
+    # Pick the layout from the first line; mixed files fall back to _parse_lines
+    first = re.search(rb"\S[^\n]*", buf).group()
+    dtype = _DTYPE_SCORE if len(first.split()) > 15 else _DTYPE
+
+    buf.seek(0)
+    try:
+        table = np.loadtxt(
+            iter(buf.readline, b""),
+            dtype=dtype,
+            comments=None,
+            ndmin=1,
+            encoding="utf-8",
+        )
+    except ValueError:
+        return None
+
+    return KittiLabels(
+        class_names=table["class_name"].tolist(),
+        truncation=table["truncation"],
+        occlusion=table["occlusion"],
+        alpha=table["alpha"],
+        bboxes=table["bounding_box"],
+        dims3d=table["3d_dimensions"],
+        locations=table["location"],
+        rotation_y=table["rotation_y"],
+        score=(
+            table["score"]
+            if "score" in table.dtype.names
+            else np.full(len(table), np.nan)
+        ),
+    )
+
+
+def _parse_lines(lines: List[str]) -> KittiLabels:
+    """
+    Parse label lines one by one, skipping malformed ones.
+
+    Args:
+        lines: Lines of a KITTI label file
+
+    Returns:
+        KittiLabels with one row per valid line
+    """
+    log.debug("Found %d lines in file", len(lines))
+
+    # Preallocate for every line, trim to the valid ones afterwards
+    class_names = []
+    numeric = np.full((len(lines), 15), np.nan)
+    occlusion = np.zeros(len(lines), dtype=int)
 
-    logging.debug(f"Successfully loaded {len(objects)} objects")
-    return objects
+    for line_num, line in enumerate(lines, 1):
+        parts = line.split()
+        if not parts:
+            continue
+
+        if len(parts) < 15:
+            log.warning("Line %d has only %d fields (needs 15+)", line_num, len(parts))
+            continue
+
+        row = len(class_names)
+        try:
+            occlusion[row] = int(parts[2])
+            fields = parts[1:16]
+            numeric[row, : len(fields)] = fields
+        except (ValueError, IndexError) as e:
+            numeric[row] = np.nan
+            log.warning("Error parsing line %d: %s", line_num, e)
+            continue
+        class_names.append(parts[0])
+
+    n = len(class_names)
+    numeric = numeric[:n]
+    return KittiLabels(
+        class_names=class_names,
+        truncation=numeric[:, 0],
+        occlusion=occlusion[:n],
+        alpha=numeric[:, 2],
+        bboxes=numeric[:, 3:7],
+        dims3d=numeric[:, 7:10],
+        locations=numeric[:, 10:13],
+        rotation_y=numeric[:, 13],
+        score=numeric[:, 14],
+    )
+
+
+def _empty_labels() -> KittiLabels:
+    """Return a KittiLabels instance with no objects."""
+    return KittiLabels.from_objects([])
+
+
+def load_kitti_labels(label_path: Union[str, Path]) -> List[Dict[str, Any]]:
+    """
+    Parse a KITTI label file and return a list of object annotations.
+
+    Args:
+        label_path: Path to the KITTI label file
+
+    Returns:
+        List of dictionaries, each containing complete KITTI annotation data
+    """
+    return load_kitti_array(label_path).to_objects()
 
 
 def write_kitti_labels(
-    label_path: Union[str, Path], objects: List[Dict[str, Any]]
+    label_path: Union[str, Path], objects: Union[List[Dict[str, Any]], KittiLabels]
 ) -> bool:
     """
     Write object annotations to a KITTI label file.
 
     Args:
         label_path: Path where to save the label file
-        objects: List of object dictionaries
+        objects: List of object dictionaries or column-wise KittiLabels
 
     Returns:
         True if successful, False otherwise
     """
     label_path = Path(label_path)
-    logging.debug(f"Writing {len(objects)} objects to: {label_path}")
+    log.debug("Writing %d objects to: %s", len(objects), label_path)
 
     # Create directory if it doesn't exist
     label_path.parent.mkdir(parents=True, exist_ok=True)
 
     try:
-        written_objects = 0
-
-        with label_path.open("w") as f:
-            for i, obj in enumerate(objects):
-                # Check required fields
-                required_fields = [
-                    "class_name",
-                    "truncation",
-                    "occlusion",
-                    "alpha",
-                    "bounding_box",
-                    "3d_dimensions",
-                    "location",
-                    "rotation_y",
-                ]
-
-                missing_fields = [
-                    field for field in required_fields if field not in obj
-                ]
-                if missing_fields:
-                    logging.warning(
-                        f"Object {i} missing fields: {missing_fields}. Skipping."
-                    )
-                    continue
-
-                # Check array sizes
-                try:
-                    if len(obj["bounding_box"]) != 4:
-                        logging.warning(f"Object {i}: bounding_box must have 4 values")
-                        continue
-                    if len(obj["3d_dimensions"]) != 3:
-                        logging.warning(f"Object {i}: 3d_dimensions must have 3 values")
-                        continue
-                    if len(obj["location"]) != 3:
-                        logging.warning(f"Object {i}: location must have 3 values")
-                        continue
-                except (TypeError, KeyError):
-                    logging.warning(f"Object {i} has invalid data structure")
-                    continue
-
-                # Build the line
-                try:
-                    line_parts = [
-                        str(obj["class_name"]),
-                        f"{obj['truncation']:.2f}",
-                        str(obj["occlusion"]),
-                        f"{obj['alpha']:.6f}",
-                        f"{obj['bounding_box'][0]:.2f}",
-                        f"{obj['bounding_box'][1]:.2f}",
-                        f"{obj['bounding_box'][2]:.2f}",
-                        f"{obj['bounding_box'][3]:.2f}",
-                        f"{obj['3d_dimensions'][0]:.2f}",
-                        f"{obj['3d_dimensions'][1]:.2f}",
-                        f"{obj['3d_dimensions'][2]:.2f}",
-                        f"{obj['location'][0]:.2f}",
-                        f"{obj['location'][1]:.2f}",
-                        f"{obj['location'][2]:.2f}",
-                        f"{obj['rotation_y']:.6f}",
-                    ]
-
-                    # Add score if it exists
-                    if obj.get("score") is not None:
-                        line_parts.append(f"{obj['score']:.4f}")
-
-                    f.write(" ".join(line_parts) + "\n")
-                    written_objects += 1
-
-                except Exception as e:
-                    logging.warning(f"Error writing object {i}: {e}")
-                    continue
-
-        logging.debug(f"Successfully wrote {written_objects} objects")
-        return True
+        if isinstance(objects, KittiLabels):
+            lines = objects.format_lines()
+        else:
+            lines = _format_objects(_validate_objects(objects))
+
+        label_path.write_text("".join(line + "\n" for line in lines))
 
     except Exception as e:
-        logging.error(f"Error writing file: {e}")
+        log.error("Error writing file: %s", e)
         return False
+
+    log.debug("Successfully wrote %d objects", len(lines))
+    return True
+
+
+def _validate_objects(
+    objects: List[Dict[str, Any]],
+) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    Select the objects that can be written as KITTI lines.
+
+    Args:
+        objects: List of object dictionaries
+
+    Returns:
+        List of (index, object) pairs for the valid objects
+    """
+    valid = []
+    for i, obj in enumerate(objects):
+        # Check required fields
+        missing_fields = _REQUIRED - obj.keys()
+        if missing_fields:
+            log.warning(
+                "Object %d missing fields: %s. Skipping.", i, sorted(missing_fields)
+            )
+            continue
+
+        # Check array sizes
+        try:
+            if len(obj["bounding_box"]) != 4:
+                log.warning("Object %d: bounding_box must have 4 values", i)
+                continue
+            if len(obj["3d_dimensions"]) != 3:
+                log.warning("Object %d: 3d_dimensions must have 3 values", i)
+                continue
+            if len(obj["location"]) != 3:
+                log.warning("Object %d: location must have 3 values", i)
+                continue
+        except (TypeError, KeyError):
+            log.warning("Object %d has invalid data structure", i)
+            continue
+
+        valid.append((i, obj))
+
+    return valid
+
+
+def _format_objects(objects: List[Tuple[int, Dict[str, Any]]]) -> List[str]:
+    """
+    Format validated objects as KITTI label lines.
+
+    Args:
+        objects: List of (index, object) pairs from _validate_objects
+
+    Returns:
+        List of label lines (without trailing newlines)
+    """
+    lines = []
+    for i, obj in objects:
+        try:
+            values = (
+                obj["class_name"],
+                obj["truncation"],
+                obj["occlusion"],
+                obj["alpha"],
+                *obj["bounding_box"],
+                *obj["3d_dimensions"],
+                *obj["location"],
+                obj["rotation_y"],
+            )
+
+            # Add score if it exists
+            score = obj.get("score")
+            if score is not None:
+                lines.append(_FMT_SCORE % (*values, score))
+            else:
+                lines.append(_FMT % values)
+
+        except Exception as e:
+            log.warning("Error writing object %d: %s", i, e)
+            continue
+
+    return lines
@@ -1,80 +1,224 @@
 import logging
-from typing import Any, Dict, List, Tuple
+import threading
+from dataclasses import replace
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import cv2
 import numpy as np
 
+from ._kernels import scale_boxes
+from .kitti import KittiLabels
+
+log = logging.getLogger(__name__)
+
+try:  # Optional: Pillow (or the SIMD build, pillow-simd) as a resize engine
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# Objects accepted by the transforms: object dictionaries or column-wise labels
+Objects = Union[List[Dict[str, Any]], KittiLabels]
+
+# Available resize engines and devices
+ENGINES = ("opencv",) if Image is None else ("opencv", "pil")
+DEVICES = ("cpu", "cuda")
+
+# Per-thread CUDA stream and device buffers, reused across frames
+_cuda_state = threading.local()
+
 
 def scale_objects(
-    objects: List[Dict[str, Any]],
+    objects: Objects,
     scale_x: float,
     scale_y: float,
     offset_x: float = 0.0,
     offset_y: float = 0.0,
-) -> List[Dict[str, Any]]:
+    *,
+    copy: bool = True,
+) -> Objects:
     """
     Scale and offset bounding boxes.
 
     Args:
-        objects: List of objects with 'bounding_box' key.
+        objects: List of objects with 'bounding_box' key, or KittiLabels.
         scale_x: Horizontal scale factor.
         scale_y: Vertical scale factor.
         offset_x: Horizontal offset to add after scaling.
         offset_y: Vertical offset to add after scaling.
+        copy: If False, update the input objects in place instead of copying.
 
     Returns:
-        List of objects with transformed bounding boxes.
+        KittiLabels for KittiLabels input (the input itself when copy is
+        False), otherwise a list of objects with transformed bounding boxes
+        (the input dictionaries, updated, when copy is False).
+    """
+    scale_vec, offset_vec = _box_vectors(scale_x, scale_y, offset_x, offset_y)
+    return scale_objects_vec(objects, scale_vec, offset_vec, copy=copy)
+
+
+def scale_objects_vec(
+    objects: Objects,
+    scale_vec: np.ndarray,
+    offset_vec: np.ndarray,
+    *,
+    copy: bool = True,
+) -> Objects:
     """
-    if scale_x <= 0 or scale_y <= 0:
-        logging.warning(f"Invalid scale factors: x={scale_x}, y={scale_y}")
+    Scale and offset bounding boxes by per-coordinate vectors.
+
+    Args:
+        objects: List of objects with 'bounding_box' key, or KittiLabels.
+        scale_vec: Scale factors for (x1, y1, x2, y2).
+        offset_vec: Offsets for (x1, y1, x2, y2), added after scaling.
+        copy: If False, update the input objects in place instead of copying.
+            Objects with missing or malformed boxes are still left out of
+            the returned list.
+
+    Returns:
+        KittiLabels for KittiLabels input (the input itself when copy is
+        False), otherwise a list of objects with transformed bounding boxes
+        (the input dictionaries, updated, when copy is False).
+    """
+    if scale_vec[0] <= 0 or scale_vec[1] <= 0:
+        log.warning("Invalid scale factors: x=%s, y=%s", scale_vec[0], scale_vec[1])
         return objects
 
-    scaled_objects = []
+    if isinstance(objects, KittiLabels):
+        if not copy:
+            scale_boxes(objects.bboxes, scale_vec, offset_vec)
+            return objects
+
+        bboxes = objects.bboxes.copy()
+        scale_boxes(bboxes, scale_vec, offset_vec)
+        return replace(objects, bboxes=bboxes)
+
+    valid = []
+    indices = []
     for i, obj in enumerate(objects):
         if "bounding_box" not in obj:
-            logging.warning(f"Object {i} missing 'bounding_box' field, skipping")
+            log.warning("Object %d missing 'bounding_box' field, skipping", i)
             continue
+        valid.append(obj)
+        indices.append(i)
 
-        try:
-            scaled_obj = obj.copy()
-            x1, y1, x2, y2 = obj["bounding_box"]
-            scaled_obj["bounding_box"] = [
-                x1 * scale_x + offset_x,
-                y1 * scale_y + offset_y,
-                x2 * scale_x + offset_x,
-                y2 * scale_y + offset_y,
-            ]
-            scaled_objects.append(scaled_obj)
+    try:
+        if any(len(obj["bounding_box"]) != 4 for obj in valid):
+            raise ValueError("bounding_box must have 4 values")
+        boxes = np.fromiter(
+            (v for obj in valid for v in obj["bounding_box"]),
+            dtype=np.float64,
+            count=4 * len(valid),
+        ).reshape(-1, 4)
+    except (ValueError, TypeError):
+        # Malformed boxes somewhere: drop them one by one
+        boxes, valid = _collect_boxes(valid, indices)
+
+    # Scale and offset all boxes at once
+    scale_boxes(boxes, scale_vec, offset_vec)
+
+    if not copy:
+        for obj, box in zip(valid, boxes.tolist()):
+            obj["bounding_box"] = box
+        return valid
+
+    scaled_objects = []
+    for obj, box in zip(valid, boxes.tolist()):
+        scaled_obj = obj.copy()
+        scaled_obj["bounding_box"] = box
+        scaled_objects.append(scaled_obj)
+
+    return scaled_objects
+
+
+@lru_cache(maxsize=64)
+def _box_vectors(
+    scale_x: float, scale_y: float, offset_x: float, offset_y: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build the (x1, y1, x2, y2) scale and offset vectors for a transform.
 
+    Batches usually share a few distinct transforms, so the read-only
+    vectors are cached and reused across images.
+
+    Args:
+        scale_x: Horizontal scale factor.
+        scale_y: Vertical scale factor.
+        offset_x: Horizontal offset.
+        offset_y: Vertical offset.
+
+    Returns:
+        Tuple of (scale_vec, offset_vec).
+    """
+    scale_vec = np.array([scale_x, scale_y, scale_x, scale_y], dtype=np.float64)
+    offset_vec = np.array([offset_x, offset_y, offset_x, offset_y], dtype=np.float64)
+    scale_vec.flags.writeable = False
+    offset_vec.flags.writeable = False
+    return scale_vec, offset_vec
+
+
+def _collect_boxes(
+    objects: List[Dict[str, Any]], indices: List[int]
+) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+    """
+    Gather bounding boxes one object at a time, skipping malformed ones.
+
+    Args:
+        objects: List of objects with 'bounding_box' key.
+        indices: Original position of each object, used in warnings.
+
+    Returns:
+        Tuple of (boxes array of shape (N, 4), objects kept).
+    """
+    boxes = []
+    kept = []
+    for i, obj in zip(indices, objects):
+        try:
+            box = np.asarray(obj["bounding_box"], dtype=np.float64)
+            if box.shape != (4,):
+                raise ValueError(f"expected 4 values, got shape {box.shape}")
         except (ValueError, TypeError) as e:
-            logging.warning(f"Error scaling object {i}: {e}")
+            log.warning("Error scaling object %d: %s", i, e)
             continue
+        boxes.append(box)
+        kept.append(obj)
 
-    return scaled_objects
+    return np.array(boxes, dtype=np.float64).reshape(-1, 4), kept
 
 
 def apply_stretch(
     img: np.ndarray,
-    objects: List[Dict[str, Any]],
+    objects: Objects,
     new_w: int,
     new_h: int,
     interpolation: int = cv2.INTER_LINEAR,
-) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+    dst: Optional[np.ndarray] = None,
+    engine: str = "opencv",
+    device: str = "cpu",
+    *,
+    copy: bool = True,
+) -> Tuple[np.ndarray, Objects]:
     """
     Resize image and scale bounding boxes accordingly.
 
     Args:
         img: Input image.
-        objects: List of objects with bounding boxes.
+        objects: List of objects with bounding boxes, or KittiLabels.
         new_w: Target width.
         new_h: Target height.
         interpolation: OpenCV interpolation method.
+        dst: Optional preallocated output image, reused when its shape and
+            dtype match the result.
+        engine: Resize backend, one of ENGINES.
+        device: "cuda" to resize on the GPU when available, "cpu" otherwise.
+        copy: If False, scale the input objects in place (for callers that
+            discard the originals).
 
     Returns:
         Tuple of (resized_image, scaled_objects).
     """
     if img is None or img.size == 0:
-        logging.error("Invalid input image")
+        log.error("Invalid input image")
         return img, objects
 
     h, w = img.shape[:2]
@@ -82,39 +226,58 @@ def apply_stretch(
     scale_y = new_h / h
 
     try:
-        resized_img = cv2.resize(img, (new_w, new_h), interpolation=interpolation)
-        scaled_objects = scale_objects(objects, scale_x, scale_y)
+        if (w, h) == (new_w, new_h):
+            # Already the target size: share the input buffer
+            resized_img = img
+        else:
+            resized_img = _resize(
+                img, (new_w, new_h), interpolation, dst, engine, device
+            )
+        scaled_objects = scale_objects_vec(
+            objects, *_box_vectors(scale_x, scale_y, 0, 0), copy=copy
+        )
         return resized_img, scaled_objects
 
     except Exception as e:
-        logging.error(f"Error during image stretching: {e}")
+        log.error("Error during image stretching: %s", e)
         return img, objects
 
 
 def apply_letterbox(
     img: np.ndarray,
-    objects: List[Dict[str, Any]],
+    objects: Objects,
     new_w: int,
     new_h: int,
     color: Tuple[int, int, int] = (114, 114, 114),
     interpolation: int = cv2.INTER_LINEAR,
-) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+    dst: Optional[np.ndarray] = None,
+    engine: str = "opencv",
+    device: str = "cpu",
+    *,
+    copy: bool = True,
+) -> Tuple[np.ndarray, Objects]:
     """
     Resize image to fit within a letterbox of specified size.
 
     Args:
         img: Input image.
-        objects: List of objects with bounding boxes.
+        objects: List of objects with bounding boxes, or KittiLabels.
         new_w: Target width.
         new_h: Target height.
         color: Color for padding (BGR).
         interpolation: OpenCV interpolation method.
+        dst: Optional preallocated output canvas, reused when its shape and
+            dtype match the result.
+        engine: Resize backend, one of ENGINES.
+        device: "cuda" to resize on the GPU when available, "cpu" otherwise.
+        copy: If False, scale the input objects in place (for callers that
+            discard the originals).
 
     Returns:
         Tuple of (letterboxed_image, scaled_objects).
     """
     if img is None or img.size == 0:
-        logging.error("Invalid input image")
+        log.error("Invalid input image")
         return img, objects
 
     h, w = img.shape[:2]
@@ -127,22 +290,159 @@ def apply_letterbox(
     pad_y = (new_h - scaled_h) // 2
 
     try:
-        # Resize image maintaining aspect ratio
-        img_resized = cv2.resize(img, (scaled_w, scaled_h), interpolation=interpolation)
-
-        # Create canvas
-        if len(img.shape) == 3:
-            canvas = np.full((new_h, new_w, 3), color, dtype=np.uint8)
+        if (w, h) == (new_w, new_h):
+            # Already the target size: share the input buffer
+            canvas = img
+        elif dst is not None and _fits(dst, img, new_w, new_h):
+            # Resize straight into the canvas and repaint only the borders
+            inner = (slice(pad_y, pad_y + scaled_h), slice(pad_x, pad_x + scaled_w))
+            _resize(
+                img, (scaled_w, scaled_h), interpolation, dst[inner], engine, device
+            )
+            fill = color if len(img.shape) == 3 else color[0]
+            dst[:pad_y] = fill
+            dst[pad_y + scaled_h :] = fill
+            dst[inner[0], :pad_x] = fill
+            dst[inner[0], pad_x + scaled_w :] = fill
+            canvas = dst
         else:
-            canvas = np.full((new_h, new_w), color[0], dtype=np.uint8)
+            # Resize image maintaining aspect ratio
+            img_resized = _resize(
+                img, (scaled_w, scaled_h), interpolation, None, engine, device
+            )
 
-        # Place resized image in center
-        canvas[pad_y : pad_y + scaled_h, pad_x : pad_x + scaled_w] = img_resized
+            # Pad around the resized image in a single pass
+            canvas = cv2.copyMakeBorder(
+                img_resized,
+                pad_y,
+                new_h - scaled_h - pad_y,
+                pad_x,
+                new_w - scaled_w - pad_x,
+                cv2.BORDER_CONSTANT,
+                value=color if len(img.shape) == 3 else color[0],
+            )
 
         # Scale objects and apply offset
-        scaled_objects = scale_objects(objects, scale, scale, pad_x, pad_y)
+        scaled_objects = scale_objects_vec(
+            objects, *_box_vectors(scale, scale, pad_x, pad_y), copy=copy
+        )
         return canvas, scaled_objects
 
     except Exception as e:
-        logging.error(f"Error during letterboxing: {e}")
+        log.error("Error during letterboxing: %s", e)
         return img, objects
+
+
+def _resize(
+    img: np.ndarray,
+    size: Tuple[int, int],
+    interpolation: int,
+    dst: Optional[np.ndarray],
+    engine: str,
+    device: str = "cpu",
+) -> np.ndarray:
+    """
+    Resize an image with the selected engine.
+
+    Args:
+        img: Input image.
+        size: Target (width, height).
+        interpolation: OpenCV interpolation method.
+        dst: Optional output array, written in place when it fits.
+        engine: Resize backend, one of ENGINES.
+        device: "cuda" to resize on the GPU (opencv engine only), "cpu" otherwise.
+
+    Returns:
+        Resized image (dst itself when it was reused).
+    """
+    if img.shape[1::-1] == size:
+        # Nothing to resize, only copy into dst if one was given
+        return img if dst is None else _copy_into(dst, img)
+
+    if engine == "opencv":
+        if device == "cuda" and cuda_available():
+            return _copy_into(dst, _cuda_resize(img, size, interpolation))
+        return cv2.resize(img, size, dst=dst, interpolation=interpolation)
+
+    if engine == "pil":
+        if Image is None:
+            raise ImportError("The 'pil' engine requires Pillow (or pillow-simd)")
+
+        filters = {
+            cv2.INTER_NEAREST: Image.NEAREST,
+            cv2.INTER_LINEAR: Image.BILINEAR,
+            cv2.INTER_CUBIC: Image.BICUBIC,
+            cv2.INTER_AREA: Image.BOX,
+            cv2.INTER_LANCZOS4: Image.LANCZOS,
+        }
+        resized = np.asarray(Image.fromarray(img).resize(size, filters[interpolation]))
+        return _copy_into(dst, resized)
+
+    raise ValueError(f"Unknown resize engine: {engine}")
+
+
+def _copy_into(dst: Optional[np.ndarray], resized: np.ndarray) -> np.ndarray:
+    """Copy resized into dst when it fits, otherwise return resized as is."""
+    if dst is None or dst.shape != resized.shape or dst.dtype != resized.dtype:
+        return resized
+
+    np.copyto(dst, resized)
+    return dst
+
+
+@lru_cache(maxsize=1)
+def cuda_available() -> bool:
+    """
+    Check whether OpenCV can resize on a CUDA device.
+
+    Returns:
+        True if OpenCV was built with CUDA warping and a device is present.
+    """
+    cuda = getattr(cv2, "cuda", None)
+    try:
+        return hasattr(cuda, "resize") and cuda.getCudaEnabledDeviceCount() > 0
+    except cv2.error:
+        return False
+
+
+def _cuda_resize(
+    img: np.ndarray, size: Tuple[int, int], interpolation: int
+) -> np.ndarray:
+    """
+    Resize an image on the GPU, synchronously.
+
+    Upload, resize and download run back to back and the call waits for
+    them, so transfers of consecutive frames don't overlap. Each thread
+    reuses its stream and device buffers, so frames of the same size
+    don't reallocate GPU memory.
+
+    Args:
+        img: Input image.
+        size: Target (width, height).
+        interpolation: OpenCV interpolation method.
+
+    Returns:
+        Resized image, downloaded to host memory.
+    """
+    if not hasattr(_cuda_state, "stream"):
+        _cuda_state.stream = cv2.cuda.Stream()
+        _cuda_state.src = cv2.cuda_GpuMat()
+        _cuda_state.out = cv2.cuda_GpuMat()
+
+    stream = _cuda_state.stream
+    _cuda_state.src.upload(img, stream)
+    cv2.cuda.resize(
+        _cuda_state.src,
+        size,
+        _cuda_state.out,
+        interpolation=interpolation,
+        stream=stream,
+    )
+    resized = _cuda_state.out.download(stream)
+    stream.waitForCompletion()
+    return resized
+
+
+def _fits(dst: np.ndarray, img: np.ndarray, new_w: int, new_h: int) -> bool:
+    """Check whether dst can hold img resized to (new_w, new_h)."""
+    return dst.shape == (new_h, new_w) + img.shape[2:] and dst.dtype == img.dtype